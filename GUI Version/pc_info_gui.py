@@ -1,184 +1,141 @@
-import subprocess
-import datetime
 import os
-import json
-import urllib.parse
+import argparse
 import sys
 import webbrowser
+from functools import partial
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QTextEdit, QFrame, QDialog
+    QLabel, QPushButton, QTextEdit, QFrame, QDialog, QFileDialog, QCheckBox,
+    QTreeView, QLineEdit, QTabWidget, QHeaderView
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QAbstractItemModel, QModelIndex
+
+# El motor (pcinfo_core.py) se comparte con la versión de consola y está en la
+# carpeta superior. Para compilar con PyInstaller: --paths ..
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pcinfo_core import (
+    DEFAULT_KEEP, DEFAULT_KEEP_DAYS, DETECTORS, DEFAULT_WIRE, TRACE_NAME, WIRE_FORMATS,
+    as_list, categories, default_output_dir, env_int, env_wire_format, load_plugins, make_search_url,
+    register_detector, render_report, save_report, scan, set_wire_format, span, start_trace,
+    trace_path, write_trace
+)
+
+
+REPORT_HEADER = ("======== PC INFO SCANNER (GUI) ========\n"
+                 "=========== Hardware Report ===========\n\n")
 
 
 # ==========================
-#   UTILS
+#   HARDWARE DETECTION
 # ==========================
 
-def run_powershell(cmd):
-    try:
-        result = subprocess.run(
-            ["powershell", "-NoLogo", "-NoProfile", "-Command", cmd],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="ignore"
-        )
-        return result.stdout.strip()
-    except:
-        return ""
+def cpu_record(c):
+    return {
+        "name": c.get("Name", "Unknown"),
+        "manufacturer": c.get("Manufacturer", "Unknown"),
+        "cores": c.get("NumberOfCores", "Unknown"),
+        "threads": c.get("NumberOfLogicalProcessors", "Unknown"),
+        "url": make_search_url(c.get("Name"))
+    }
 
 
-def make_search_url(name):
-    if not name or str(name).lower() == "unknown":
-        return ""
-    return f"https://www.google.com/search?q={urllib.parse.quote_plus(str(name))}"
+def section_cpu(f, cpu):
+    f.write("\n=== CPU ===\n")
+    for c in cpu:
+        f.write(f"{c['name']} ({c['cores']}C/{c['threads']}T)\n")
+        f.write(f"Fabricante: {c['manufacturer']}\n")
+        f.write(f"URL: {c['url']}\n\n")
 
 
-# ==========================
-#   HARDWARE DETECTION
-# ==========================
+def gpu_record(g):
+    return {
+        "name": g.get("Name", "Unknown"),
+        "vendor": g.get("AdapterCompatibility", "Unknown"),
+        "driver": g.get("DriverVersion", "Unknown"),
+        "url": make_search_url(g.get("Name"))
+    }
 
-def get_cpu():
-    cmd = "Get-CimInstance Win32_Processor | Select-Object Name,Manufacturer,NumberOfCores,NumberOfLogicalProcessors | ConvertTo-Json"
-    out = run_powershell(cmd)
 
-    try:
-        data = json.loads(out) if out else []
-        if isinstance(data, dict):
-            data = [data]
-        lst = []
-        for c in data:
-            lst.append({
-                "name": c.get("Name", "Unknown"),
-                "manufacturer": c.get("Manufacturer", "Unknown"),
-                "cores": c.get("NumberOfCores", "Unknown"),
-                "threads": c.get("NumberOfLogicalProcessors", "Unknown"),
-                "url": make_search_url(c.get("Name"))
-            })
-        return lst
-    except:
-        return []
+def section_gpu(f, gpu):
+    f.write("\n=== GPU ===\n")
+    for g in gpu:
+        f.write(f"{g['name']} - {g['vendor']}\n")
+        f.write(f"Driver: {g['driver']}\n")
+        f.write(f"URL: {g['url']}\n\n")
 
 
-def get_gpu():
-    cmd = "Get-CimInstance Win32_VideoController | Select-Object Name,AdapterCompatibility,DriverVersion | ConvertTo-Json"
-    out = run_powershell(cmd)
+def ram_record(cs):
+    return round(int(cs.get("TotalPhysicalMemory")) / (1024**3))
 
-    try:
-        data = json.loads(out) if out else []
-        if isinstance(data, dict):
-            data = [data]
-        lst = []
-        for g in data:
-            lst.append({
-                "name": g.get("Name", "Unknown"),
-                "vendor": g.get("AdapterCompatibility", "Unknown"),
-                "driver": g.get("DriverVersion", "Unknown"),
-                "url": make_search_url(g.get("Name"))
-            })
-        return lst
-    except:
-        return []
 
+def section_ram(f, ram):
+    f.write("\n=== RAM ===\n")
+    f.write(f"Total: {ram} GB\n\n")
 
-def get_ram():
-    out = run_powershell("(Get-CimInstance Win32_ComputerSystem).TotalPhysicalMemory")
+
+def disk_record(d):
+    size = 0
     try:
-        return round(int(out) / (1024**3))
+        size = round(int(d.get("Size", 0)) / (1024**3))
     except:
-        return 0
+        pass
 
+    return {
+        "model": d.get("Model", "Unknown"),
+        "type": d.get("MediaType", "Unknown"),
+        "size": size,
+        "url": make_search_url(d.get("Model"))
+    }
 
-def get_disks():
-    cmd = "Get-CimInstance Win32_DiskDrive | Select-Object Model,MediaType,Size | ConvertTo-Json"
-    out = run_powershell(cmd)
 
-    try:
-        data = json.loads(out) if out else []
-        if isinstance(data, dict):
-            data = [data]
-        lst = []
-        for d in data:
-            size = 0
-            try:
-                size = round(int(d.get("Size", 0)) / (1024**3))
-            except:
-                pass
-
-            lst.append({
-                "model": d.get("Model", "Unknown"),
-                "type": d.get("MediaType", "Unknown"),
-                "size": size,
-                "url": make_search_url(d.get("Model"))
-            })
-        return lst
-    except:
-        return []
+def section_disks(f, disks):
+    f.write("\n=== ALMACENAMIENTO ===\n")
+    for d in disks:
+        f.write(f"Modelo : {d['model']}\n")
+        f.write(f"Tipo   : {d['type']}\n")
+        f.write(f"Tamaño : {d['size']} GB\n")
+        f.write(f"URL    : {d['url']}\n\n")
 
 
-def get_motherboard():
-    cmd = "Get-CimInstance Win32_BaseBoard | Select-Object Manufacturer,Product | ConvertTo-Json"
-    out = run_powershell(cmd)
+def motherboard_record(data):
+    name = f"{data.get('Manufacturer','')} {data.get('Product','')}".strip()
+    if not name:
+        name = "Unknown"
+    return {"name": name, "url": make_search_url(name)}
 
-    try:
-        data = json.loads(out) if out else {}
-        name = f"{data.get('Manufacturer','')} {data.get('Product','')}".strip()
-        if not name:
-            name = "Unknown"
-        return {"name": name, "url": make_search_url(name)}
-    except:
-        return {"name": "Unknown", "url": ""}
 
+def section_motherboard(f, mb):
+    f.write("=== MOTHERBOARD ===\n")
+    f.write(f"Modelo : {mb['name']}\n")
+    f.write(f"URL    : {mb['url']}\n\n")
 
-def get_fans():
-    cmd = "Get-CimInstance Win32_Fan | Select-Object Name | ConvertTo-Json"
-    out = run_powershell(cmd)
 
-    try:
-        if not out:
-            return []
-        data = json.loads(out)
-        if isinstance(data, dict):
-            data = [data]
-        return [x.get("Name", "Unknown") for x in data]
-    except:
-        return []
+def section_fans(f, fans):
+    f.write("=== VENTILADORES ===\n")
+    if fans:
+        for fan in fans:
+            f.write(f"- {fan}\n")
+    else:
+        f.write("No detectados.\n")
+    f.write("\n")
 
 
 # ==========================
 #   MONITORES COMPLETOS
 # ==========================
 
-def get_monitors():
-    cmd_basic = "Get-CimInstance Win32_DesktopMonitor | Select-Object Name,PNPDeviceID,ScreenWidth,ScreenHeight | ConvertTo-Json"
-    out_basic = run_powershell(cmd_basic)
-
-    try:
-        basic = json.loads(out_basic) if out_basic else []
-        if isinstance(basic, dict):
-            basic = [basic]
-    except:
-        basic = []
-
-    cmd_friendly = r"""
+MONITOR_ID_COMMAND = r"""
     Get-CimInstance -Namespace root\wmi -ClassName WmiMonitorID |
     Select-Object InstanceName,
-        @{Name='FriendlyName';Expression={ ($_.UserFriendlyName | Where-Object {$_ -ne 0} | ForEach-Object {[char]$_]) -join '' }},
-        @{Name='Manufacturer';Expression={ ($_.ManufacturerName | Where-Object {$_ -ne 0} | ForEach-Object {[char]$_]) -join '' }},
-        @{Name='Serial';Expression={ ($_.SerialNumberID | Where-Object {$_ -ne 0} | ForEach-Object {[char]$_]) -join '' }} |
-    ConvertTo-Json
+        @{Name='FriendlyName';Expression={ ($_.UserFriendlyName | Where-Object {$_ -ne 0} | ForEach-Object {[char]$_}) -join '' }},
+        @{Name='Manufacturer';Expression={ ($_.ManufacturerName | Where-Object {$_ -ne 0} | ForEach-Object {[char]$_}) -join '' }},
+        @{Name='Serial';Expression={ ($_.SerialNumberID | Where-Object {$_ -ne 0} | ForEach-Object {[char]$_}) -join '' }}
     """
-    out_friendly = run_powershell(cmd_friendly)
 
-    try:
-        friendly = json.loads(out_friendly) if out_friendly else []
-        if isinstance(friendly, dict):
-            friendly = [friendly]
-    except:
-        friendly = []
+
+def correlate_monitors(basic, deps):
+    friendly = deps["monitor_ids"]
 
     final = []
     for b in basic:
@@ -210,99 +167,83 @@ def get_monitors():
     return final
 
 
+def section_monitors(f, monitors):
+    f.write("=== MONITORES DETECTADOS ===\n")
+    for m in monitors:
+        f.write(f"Monitor : {m['name']}\n")
+        f.write(f"Vendor  : {m['vendor']}\n")
+        f.write(f"Serial  : {m['serial']}\n")
+        f.write(f"Resolución: {m['width']}x{m['height']}\n")
+        f.write(f"URL: {m['url']}\n\n")
+
+
 # ==========================
 #   RED
 # ==========================
 
-def get_ip_local():
-    cmd = "(Get-NetIPAddress | Where-Object {$_.AddressFamily -eq 'IPv4' -and $_.IPAddress -notlike '169.*'}).IPAddress"
-    return run_powershell(cmd)
+def join_lines(values, deps):
+    return "\n".join(str(v) for v in values)
+
 
+def section_network(f, net):
+    f.write(f"IP Local  : {net['ip_local']}\n")
+    f.write(f"IP Pública: {net['ip_public']}\n\n")
 
-def get_ip_public():
-    return run_powershell("(Invoke-RestMethod 'https://api.ipify.org')")
+
+# ==========================
+#   DETECTORES REGISTRADOS
+# ==========================
+
+# Los detectores con sección aparecen en el informe (y como casilla) en
+# este orden de registro.
+register_detector("ip_local",
+                  command="(Get-NetIPAddress | Where-Object {$_.AddressFamily -eq 'IPv4' -and $_.IPAddress -notlike '169.*'}).IPAddress",
+                  finish=join_lines, default="")
+register_detector("ip_public", command="(Invoke-RestMethod 'https://api.ipify.org')",
+                  cost="network", finish=join_lines, default="")
+register_detector("network", collect=lambda deps: deps, depends=["ip_local", "ip_public"],
+                  single=True, default={"ip_local": "", "ip_public": ""},
+                  section=section_network, label="Red")
+register_detector("cpu", source="Win32_Processor",
+                  fields=["Name", "Manufacturer", "NumberOfCores", "NumberOfLogicalProcessors"],
+                  record=cpu_record, section=section_cpu, label="CPU")
+register_detector("gpu", source="Win32_VideoController",
+                  fields=["Name", "AdapterCompatibility", "DriverVersion"],
+                  record=gpu_record, section=section_gpu, label="GPU")
+register_detector("ram", source="Win32_ComputerSystem", fields=["TotalPhysicalMemory"],
+                  record=ram_record, single=True, default=0, section=section_ram, label="RAM")
+register_detector("disks", source="Win32_DiskDrive", fields=["Model", "MediaType", "Size"],
+                  record=disk_record, section=section_disks, label="Almacenamiento")
+register_detector("motherboard", source="Win32_BaseBoard", fields=["Manufacturer", "Product"],
+                  record=motherboard_record, single=True, default={"name": "Unknown", "url": ""},
+                  section=section_motherboard, label="Motherboard")
+register_detector("fans", source="Win32_Fan", fields=["Name"],
+                  record=lambda x: x.get("Name", "Unknown"), section=section_fans, label="Ventiladores")
+register_detector("monitor_ids", command=MONITOR_ID_COMMAND,
+                  fields=["InstanceName", "FriendlyName", "Manufacturer", "Serial"])
+register_detector("monitors", source="Win32_DesktopMonitor",
+                  fields=["Name", "PNPDeviceID", "ScreenWidth", "ScreenHeight"],
+                  depends=["monitor_ids"], finish=correlate_monitors,
+                  section=section_monitors, label="Monitores")
 
 
 # ===========================================
 #       GENERAR REPORTE
 # ===========================================
 
-def generate_report():
-    now = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
-    if not os.path.isdir(desktop):
-        desktop = os.getcwd()
-    file_path = os.path.join(desktop, f"PC_INFO_{now}.txt")
-
-    cpu = get_cpu()
-    gpu = get_gpu()
-    ram = get_ram()
-    disks = get_disks()
-    mb = get_motherboard()
-    fans = get_fans()
-    monitors = get_monitors()
-    ip_local = get_ip_local()
-    ip_public = get_ip_public()
-
-    with open(file_path, "w", encoding="utf-8") as f:
-
-        f.write("======== PC INFO SCANNER (GUI) ========\n")
-        f.write("=========== Hardware Report ===========\n\n")
-
-        f.write(f"IP Local  : {ip_local}\n")
-        f.write(f"IP Pública: {ip_public}\n\n")
-
-        # CPU
-        f.write("\n=== CPU ===\n")
-        if cpu:
-            for c in cpu:
-                f.write(f"{c['name']} ({c['cores']}C/{c['threads']}T)\n")
-                f.write(f"Fabricante: {c['manufacturer']}\n")
-                f.write(f"URL: {c['url']}\n\n")
-
-        # GPU
-        f.write("\n=== GPU ===\n")
-        for g in gpu:
-            f.write(f"{g['name']} - {g['vendor']}\n")
-            f.write(f"Driver: {g['driver']}\n")
-            f.write(f"URL: {g['url']}\n\n")
-
-        # RAM
-        f.write("\n=== RAM ===\n")
-        f.write(f"Total: {ram} GB\n\n")
-
-        # DISKS
-        f.write("\n=== ALMACENAMIENTO ===\n")
-        for d in disks:
-            f.write(f"Modelo : {d['model']}\n")
-            f.write(f"Tipo   : {d['type']}\n")
-            f.write(f"Tamaño : {d['size']} GB\n")
-            f.write(f"URL    : {d['url']}\n\n")
-
-        # Motherboard
-        f.write("=== MOTHERBOARD ===\n")
-        f.write(f"Modelo : {mb['name']}\n")
-        f.write(f"URL    : {mb['url']}\n\n")
-
-        # Fans
-        f.write("=== VENTILADORES ===\n")
-        if fans:
-            for fan in fans:
-                f.write(f"- {fan}\n")
-        else:
-            f.write("No detectados.\n")
-        f.write("\n")
-
-        # Monitors
-        f.write("=== MONITORES DETECTADOS ===\n")
-        for m in monitors:
-            f.write(f"Monitor : {m['name']}\n")
-            f.write(f"Vendor  : {m['vendor']}\n")
-            f.write(f"Serial  : {m['serial']}\n")
-            f.write(f"Resolución: {m['width']}x{m['height']}\n")
-            f.write(f"URL: {m['url']}\n\n")
-
-    return file_path
+def generate_report(out_dir=None, keep=None, keep_days=None, dedup=True, selected=None):
+    """Escanea y guarda el informe. Devuelve (ruta, escrito, contenido, resultados)."""
+    with span("scan", "report"):
+        results = scan(selected)
+        content = render_report(results, REPORT_HEADER, selected)
+        path, written = save_report(
+            content,
+            out_dir or default_output_dir(),
+            env_int("PCINFO_KEEP", DEFAULT_KEEP) if keep is None else keep,
+            env_int("PCINFO_KEEP_DAYS", DEFAULT_KEEP_DAYS) if keep_days is None else keep_days,
+            dedup
+        )
+    return path, written, content, results
 
 
 # ===========================================
@@ -310,25 +251,181 @@ def generate_report():
 # ===========================================
 
 class ScanThread(QThread):
-    finished = pyqtSignal(str, str)
+    finished = pyqtSignal(str, bool, str, object)
     error = pyqtSignal(str)
 
+    def __init__(self, out_dir, selected, trace=None):
+        super().__init__()
+        self.out_dir = out_dir
+        self.selected = selected
+        self.trace = trace
+        self.trace_file = None
+
     def run(self):
         try:
-            path = generate_report()
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-            self.finished.emit(path, content)
+            if self.trace is not None:
+                start_trace()
+            path, written, content, results = generate_report(self.out_dir, selected=self.selected)
+            if self.trace is not None:
+                self.trace_file = trace_path(self.out_dir, self.trace)
+                write_trace(self.trace_file)
+            self.finished.emit(path, written, content, results)
         except Exception as e:
             self.error.emit(str(e))
 
 
+# ===========================================
+#       VISTA DE ÁRBOL
+# ===========================================
+
+def item_text(value):
+    return "" if value is None else str(value).replace("\n", ", ")
+
+
+def item_label(item, fallback):
+    if isinstance(item, dict):
+        for key in ("name", "model"):
+            if item.get(key):
+                return item_text(item[key])
+        return fallback
+    return item_text(item)
+
+
+def search_text(item):
+    # Sólo los valores: las claves ("name") y la URL de búsqueda ("google.com")
+    # coincidirían con todos los dispositivos
+    if isinstance(item, dict):
+        return "\n".join(item_text(v) for k, v in item.items() if k != "url").casefold()
+    return item_text(item).casefold()
+
+
+class TreeNode:
+    __slots__ = ("label", "value", "parent", "row", "children", "pending")
+
+    def __init__(self, label, value="", parent=None, row=0, pending=None):
+        self.label = label
+        self.value = value
+        self.parent = parent
+        self.row = row
+        self.children = []
+        # Función que arma los hijos la primera vez que se expande el nodo
+        self.pending = pending
+
+
+class ReportTreeModel(QAbstractItemModel):
+    """Categorías -> dispositivos -> propiedades, sobre los resultados en memoria.
+
+    Sólo se crean los nodos de las ramas que se expanden, y el filtro busca
+    en un texto precalculado por dispositivo en vez de recorrer el árbol.
+    """
+
+    HEADERS = ("Elemento", "Valor")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = TreeNode("")
+        self.entries = []
+        self.filter_text = ""
+
+    def set_results(self, results, selected):
+        # [(etiqueta, [(dispositivo, texto de búsqueda), ...])] en orden de informe
+        self.entries = []
+        for name in categories():
+            if name in selected and name in results:
+                items = as_list(results[name])
+                self.entries.append((DETECTORS[name]["label"], [(i, search_text(i)) for i in items]))
+        self.rebuild()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip().casefold()
+        self.rebuild()
+
+    def rebuild(self):
+        self.beginResetModel()
+        self.root = TreeNode("")
+        needle = self.filter_text
+        for label, items in self.entries:
+            if needle and needle not in label.casefold():
+                items = [(i, t) for i, t in items if needle in t]
+                if not items:
+                    continue
+            devices = [i for i, _ in items]
+            node = TreeNode(label, str(len(devices)), self.root, len(self.root.children),
+                            partial(self.device_nodes, label, devices))
+            self.root.children.append(node)
+        self.endResetModel()
+
+    def device_nodes(self, label, devices, parent):
+        nodes = []
+        for row, item in enumerate(devices):
+            pending = partial(self.property_nodes, item) if isinstance(item, dict) else None
+            nodes.append(TreeNode(item_label(item, label), "", parent, row, pending))
+        return nodes
+
+    def property_nodes(self, item, parent):
+        return [TreeNode(str(k), item_text(v), parent, row) for row, (k, v) in enumerate(item.items())]
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.node(parent).children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer().parent
+        if node is None or node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node(parent)
+        return bool(node.children) or node.pending is not None
+
+    def canFetchMore(self, parent):
+        return self.node(parent).pending is not None
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        build, node.pending = node.pending, None
+        if build is None:
+            return
+        children = build(node)
+        if not children:
+            return
+        self.beginInsertRows(parent, 0, len(children) - 1)
+        node.children = children
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        node = index.internalPointer()
+        return node.label if index.column() == 0 else node.value
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+
 # ===========================================
 #         GUI
 # ===========================================
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, trace=None):
         super().__init__()
 
         # Ventana sin marco
@@ -375,6 +472,30 @@ class MainWindow(QMainWindow):
             font-family: Consolas, 'Cascadia Code', monospace;
             font-size: 9pt; color: #E5E7EB;
         }
+
+        QLineEdit {
+            background-color: #020617; border-radius: 6px;
+            border: 1px solid #334155; padding: 6px 8px;
+        }
+        QLineEdit:focus { border: 1px solid #2563EB; }
+
+        QTreeView {
+            background-color: #020617; border-radius: 6px;
+            border: 1px solid #334155; font-size: 9pt;
+            alternate-background-color: #0B1222;
+        }
+        QTreeView::item:selected { background-color: #1E3A8A; color: #F9FAFB; }
+        QHeaderView::section {
+            background-color: #0F172A; color: #9CA3AF;
+            border: none; border-bottom: 1px solid #334155; padding: 4px 8px;
+        }
+
+        QTabWidget::pane { border: none; }
+        QTabBar::tab {
+            background-color: #0F172A; color: #9CA3AF;
+            padding: 6px 16px; border-top-left-radius: 6px; border-top-right-radius: 6px;
+        }
+        QTabBar::tab:selected { background-color: #020617; color: #E5E7EB; }
         """)
 
         central = QWidget()
@@ -434,26 +555,65 @@ class MainWindow(QMainWindow):
         left = QVBoxLayout()
         self.status_label = QLabel("Listo para generar el informe.")
         self.status_label.setObjectName("SubtitleLabel")
-        hint = QLabel("El archivo .txt se guardará en tu Escritorio.")
-        hint.setObjectName("SubtitleLabel")
+        self.out_dir = default_output_dir()
+        self.hint_label = QLabel()
+        self.hint_label.setObjectName("SubtitleLabel")
+        self.update_hint()
         left.addWidget(self.status_label)
-        left.addWidget(hint)
+        left.addWidget(self.hint_label)
+
+        checks_row = QHBoxLayout()
+        self.category_checks = {}
+        for name in categories():
+            check = QCheckBox(DETECTORS[name]["label"])
+            check.setChecked(True)
+            self.category_checks[name] = check
+            checks_row.addWidget(check)
+        checks_row.addStretch()
+        left.addLayout(checks_row)
         left.addStretch()
 
         right = QVBoxLayout()
         self.scan_button = QPushButton("Generar informe")
         self.scan_button.clicked.connect(self.start_scan)
         right.addWidget(self.scan_button, alignment=Qt.AlignRight)
+        self.folder_button = QPushButton("Cambiar carpeta")
+        self.folder_button.clicked.connect(self.choose_folder)
+        right.addWidget(self.folder_button, alignment=Qt.AlignRight)
 
         cl.addLayout(left, 3)
         cl.addLayout(right, 1)
 
         layout.addWidget(card)
 
+        # FILTRO
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filtrar (ej: nvidia, ssd, ddr4)...")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.apply_filter)
+        layout.addWidget(self.filter_edit)
+
+        # ÁRBOL (sólo se arman las ramas que se expanden)
+        self.tree_model = ReportTreeModel(self)
+        self.tree_view = QTreeView()
+        self.tree_view.setModel(self.tree_model)
+        self.tree_view.setUniformRowHeights(True)
+        self.tree_view.setAlternatingRowColors(True)
+        self.tree_view.setColumnWidth(0, 260)
+        self.tree_view.header().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.tree_view.header().setStretchLastSection(True)
+
         # TEXTAREA
         self.text_edit = QTextEdit()
         self.text_edit.setReadOnly(True)
-        layout.addWidget(self.text_edit, stretch=1)
+        self.report_text = ""
+        self.text_loaded = True
+
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.tree_view, "Árbol")
+        self.tabs.addTab(self.text_edit, "Texto")
+        self.tabs.currentChanged.connect(self.load_text)
+        layout.addWidget(self.tabs, stretch=1)
 
         # ===================== BOTÓN DE CRÉDITOS =====================
         credits_row = QHBoxLayout()
@@ -467,6 +627,7 @@ class MainWindow(QMainWindow):
         root.addWidget(content)
 
         self.scan_thread = None
+        self.trace = trace
 
 
     # ===================== POPUP OSCURO =====================
@@ -576,25 +737,69 @@ class MainWindow(QMainWindow):
         self._drag_pos = None
 
 
+    # ===================== CARPETA DE SALIDA =====================
+    def update_hint(self):
+        self.hint_label.setText(f"El archivo .txt se guardará en: {self.out_dir}")
+
+    def choose_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Carpeta de informes", self.out_dir)
+        if folder:
+            self.out_dir = folder
+            self.update_hint()
+
+
     # ===================== ESCANEO =====================
+    def selected_categories(self):
+        return [name for name, check in self.category_checks.items() if check.isChecked()]
+
     def start_scan(self):
         if self.scan_thread and self.scan_thread.isRunning():
             return
 
+        selected = self.selected_categories()
+        if not selected:
+            self.show_popup("Seleccioná al menos una categoría para escanear.")
+            return
+
         self.status_label.setText("Generando informe...")
         self.scan_button.setEnabled(False)
         self.text_edit.clear()
+        self.report_text = ""
+        self.text_loaded = True
+        self.tree_model.set_results({}, [])
 
-        self.scan_thread = ScanThread()
+        self.scan_thread = ScanThread(self.out_dir, selected, self.trace)
         self.scan_thread.finished.connect(self.on_scan_finished)
         self.scan_thread.error.connect(self.on_scan_error)
         self.scan_thread.start()
 
-    def on_scan_finished(self, path, content):
-        self.status_label.setText(f"Informe generado en: {path}")
+    def on_scan_finished(self, path, written, content, results):
         self.scan_button.setEnabled(True)
-        self.text_edit.setPlainText(content)
-        self.show_popup(f"Informe generado en:\n{path}")
+        self.tree_model.set_results(results, self.scan_thread.selected)
+        if self.filter_edit.text().strip():
+            self.tree_view.expandToDepth(0)
+        # El informe en texto se carga recién cuando se abre su pestaña
+        self.report_text = content
+        self.text_loaded = False
+        self.load_text()
+        if written:
+            self.status_label.setText(f"Informe generado en: {path}")
+            self.show_popup(f"Informe generado en:\n{path}")
+        else:
+            self.status_label.setText(f"Sin cambios respecto al informe anterior: {path}")
+            self.show_popup(f"Sin cambios respecto al informe anterior:\n{path}")
+        if self.scan_thread.trace_file:
+            self.status_label.setText(f"{self.status_label.text()} (traza: {self.scan_thread.trace_file})")
+
+    def load_text(self, *_):
+        if not self.text_loaded and self.tabs.currentWidget() is self.text_edit:
+            self.text_edit.setPlainText(self.report_text)
+            self.text_loaded = True
+
+    def apply_filter(self, text):
+        self.tree_model.set_filter(text)
+        if text.strip():
+            self.tree_view.expandToDepth(0)
 
     def on_scan_error(self, err):
         self.status_label.setText("Error al generar el informe.")
@@ -606,10 +811,32 @@ class MainWindow(QMainWindow):
 #   MAIN
 # ======================================================
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PCInfoScanner (GUI)")
+    parser.add_argument("--trace", nargs="?", const="", default=os.environ.get("PCINFO_TRACE"),
+                        metavar="ARCHIVO",
+                        help="Guardar una traza de cada escaneo (JSON para chrome://tracing o Perfetto; "
+                             f"por defecto {TRACE_NAME} en la carpeta de informes, que se sobrescribe)")
+    parser.add_argument("--wire", choices=WIRE_FORMATS, default=env_wire_format(),
+                        help="Formato entre PowerShell y Python: json (ConvertTo-Json, por defecto) o rows (compacto)")
+    # El resto de los argumentos quedan para Qt
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
 def main():
+    problems = [f"No se pudo cargar el detector externo {name}: {error}" for name, error in load_plugins()]
+    args = parse_args()
+    try:
+        set_wire_format(args.wire)
+    except ValueError as e:
+        # Sin consola no se vería un error de argparse: se avisa y se usa el formato por defecto
+        problems.append(f"PCINFO_WIRE: {e}. Se usa {DEFAULT_WIRE}.")
     app = QApplication(sys.argv)
-    window = MainWindow()
+    window = MainWindow(trace=args.trace)
     window.show()
+    if problems:
+        window.show_popup("\n".join(problems))
     sys.exit(app.exec_())
 
 
@@ -0,0 +1,695 @@
+# Motor compartido de PCInfoScanner: PowerShell, traza, formato de transporte y
+# registro/planificador de detectores, retención de informes. Lo importan la versión de consola
+# (pcinfow10-11.py) y la GUI (GUI Version/pc_info_gui.py); cada una registra
+# sus propios detectores y secciones del informe.
+import subprocess
+import datetime
+import os
+import io
+import json
+import codecs
+import time
+import itertools
+import threading
+import re
+import urllib.parse
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+def run_powershell(ps_command):
+    try:
+        with span("powershell", "process", chars=len(ps_command)):
+            completed = subprocess.run(
+                ["powershell", "-NoLogo", "-NoProfile", "-Command", ps_command],
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="ignore"
+            )
+        return completed.stdout.strip()
+    except Exception as e:
+        return f"ERROR: {e}"
+
+def stream_powershell(ps_command, chunk_size=65536):
+    # Como run_powershell, pero entrega la salida por partes a medida que llega
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    try:
+        with span("powershell", "process", chars=len(ps_command)):
+            with subprocess.Popen(
+                ["powershell", "-NoLogo", "-NoProfile", "-Command", ps_command],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            ) as proc:
+                while True:
+                    data = proc.stdout.read1(chunk_size)
+                    if not data:
+                        break
+                    yield decoder.decode(data)
+                yield decoder.decode(b"", final=True)
+    except OSError:
+        return
+
+def make_search_url(name):
+    if not name or str(name).lower() == "unknown":
+        return ""
+    return f"https://www.google.com/search?q={urllib.parse.quote_plus(str(name))}"
+
+# ------------------ TRAZA ------------------
+
+# Con --trace se registran spans en formato "trace event" de Chrome/Perfetto.
+# Sin traza activa, span() devuelve NO_SPAN y no mide nada.
+TRACE = None
+TRACE_T0 = 0.0
+TRACE_EPOCH = 0.0
+TRACE_THREADS = {}
+TRACE_MARK = "#PCINFO-TRACE#"
+TRACE_NAME = "PC_INFO_trace.json"
+PS_TRACKS = itertools.count(1)
+
+class NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NO_SPAN = NoSpan()
+
+class Span:
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        trace_event(self.name, self.cat, self.start, time.perf_counter(), args=self.args)
+        return False
+
+def start_trace():
+    global TRACE, TRACE_T0, TRACE_EPOCH
+    TRACE = []
+    TRACE_THREADS.clear()
+    TRACE_T0 = time.perf_counter()
+    TRACE_EPOCH = time.time()
+
+def span(name, cat="scan", **args):
+    if TRACE is None:
+        return NO_SPAN
+    return Span(name, cat, args)
+
+def trace_event(name, cat, start, end, tid=None, args=None):
+    # start/end en segundos de time.perf_counter()
+    if tid is None:
+        tid = threading.get_ident()
+        TRACE_THREADS.setdefault(tid, threading.current_thread().name)
+    TRACE.append({
+        "name": name,
+        "cat": cat,
+        "ph": "X",
+        "pid": os.getpid(),
+        "tid": tid,
+        "ts": round((start - TRACE_T0) * 1e6, 1),
+        "dur": round((end - start) * 1e6, 1),
+        "args": args or {},
+    })
+
+def trace_powershell(out, spawned, finished):
+    """Separa los tiempos internos que informa PowerShell y los agrega a la traza."""
+    out, _, timings = out.partition(TRACE_MARK)
+    trace_timings(timings, spawned, finished)
+    return out.strip()
+
+def trace_timings(timings, spawned, finished):
+    try:
+        t = json.loads(timings)
+        anchor = TRACE_T0 + (t.pop("__start") / 1000 - TRACE_EPOCH)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return
+
+    # Cada proceso de PowerShell va en su propia pista
+    tid = 100000 + next(PS_TRACKS)
+    TRACE_THREADS[tid] = f"PowerShell #{tid - 100000}"
+    trace_event("powershell start-up", "powershell", spawned, max(spawned, anchor), tid)
+    last = anchor
+    for name, times in t.items():
+        # Windows PowerShell 5.1 puede serializar el par como {value, Count};
+        # una entrada que no sea un par de números se descarta: la traza
+        # nunca debe interrumpir el escaneo
+        try:
+            start, end = (float(x) for x in as_list(times))
+        except (ValueError, TypeError):
+            continue
+        trace_event(name, "powershell", anchor + start / 1000, anchor + end / 1000, tid)
+        last = max(last, anchor + end / 1000)
+    trace_event("powershell exit", "powershell", last, max(last, finished), tid)
+
+def trace_path(out_dir, path=None):
+    # Sin archivo explícito, cada escaneo sobrescribe la misma traza
+    return path or os.path.join(out_dir, TRACE_NAME)
+
+def write_trace(path):
+    pid = os.getpid()
+    events = list(TRACE)
+    events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "PCInfoScanner"}})
+    for tid, name in TRACE_THREADS.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+# ------------------ FORMATO DE TRANSPORTE ------------------
+
+# "rows": cada registro es detector<US>valor<US>valor...<RS>, con los campos
+# en el orden de `fields` y cada valor prefijado por su tipo (s texto,
+# i entero, f decimal, b booleano, n nulo). Evita ConvertTo-Json, que es
+# lento en Windows PowerShell 5.1, y se decodifica a medida que llega.
+# "json" (ConvertTo-Json + json.loads) sigue siendo el formato por defecto
+# hasta tener mediciones de --bench-wire en Windows PowerShell 5.1; se elige
+# con --wire o PCINFO_WIRE.
+WIRE_FORMATS = ("json", "rows")
+DEFAULT_WIRE = "json"
+WIRE_FORMAT = DEFAULT_WIRE
+US = "\x1f"
+RS = "\x1e"
+
+PS_UTF8 = "try { [Console]::OutputEncoding = [Text.Encoding]::UTF8 } catch { }"
+
+PS_ROWS_PRELUDE = r"""
+$US = [string][char]0x1f; $RS = [string][char]0x1e
+$Inv = [Globalization.CultureInfo]::InvariantCulture
+function Enc($v) {
+    if ($null -eq $v) { return 'n' }
+    if ($v -is [bool]) { if ($v) { return 'b1' } else { return 'b0' } }
+    if ($v -is [int] -or $v -is [long] -or $v -is [uint32] -or $v -is [uint64] -or
+        $v -is [int16] -or $v -is [uint16] -or $v -is [byte] -or $v -is [sbyte]) { return 'i' + $v }
+    if ($v -is [double] -or $v -is [single] -or $v -is [decimal]) { return 'f' + $v.ToString($Inv) }
+    return 's' + ([string]$v).Replace($US, ' ').Replace($RS, ' ')
+}
+function Out-Rows($name, $items, $fields) {
+    $sb = New-Object Text.StringBuilder
+    foreach ($o in $items) {
+        [void]$sb.Append($name)
+        if ($fields) {
+            foreach ($f in $fields) { [void]$sb.Append($US).Append((Enc $o.$f)) }
+        } else {
+            [void]$sb.Append($US).Append((Enc $o))
+        }
+        [void]$sb.Append($RS)
+    }
+    [Console]::Out.Write($sb.ToString())
+}
+"""
+
+def env_wire_format():
+    return os.environ.get("PCINFO_WIRE", DEFAULT_WIRE)
+
+def set_wire_format(wire):
+    global WIRE_FORMAT
+    if wire not in WIRE_FORMATS:
+        raise ValueError(f"Formato de transporte desconocido: {wire} (válidos: {', '.join(WIRE_FORMATS)})")
+    WIRE_FORMAT = wire
+
+def decode_value(v):
+    kind, text = v[:1], v[1:]
+    if kind == "s":
+        return text
+    if kind == "i":
+        return int(text)
+    if kind == "f":
+        return float(text)
+    if kind == "b":
+        return text == "1"
+    return None
+
+def iter_rows(chunks, fields):
+    """Decodifica el formato "rows" a medida que llegan los trozos de salida.
+
+    `fields` asocia cada detector con sus campos; genera (detector, registro),
+    donde el registro es un dict o, sin campos, el valor suelto.
+    """
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        if RS not in chunk:
+            continue
+        *complete, buf = buf.split(RS)
+        for row in complete:
+            name, *values = row.lstrip("\r\n").split(US)
+            values = [decode_value(v) for v in values]
+            names = fields.get(name)
+            if names:
+                yield name, dict(zip(names, values))
+            elif values:
+                yield name, values[0]
+
+# ------------------ REGISTRO DE DETECTORES ------------------
+
+PLUGIN_GROUP = "pcinfoscanner.detectors"
+COST_CLASSES = ("cim", "slow", "network")
+
+DETECTORS = {}
+
+def make_detector(name, source=None, fields=None, namespace=None, command=None,
+                  collect=None, record=None, finish=None, depends=(), cost="cim",
+                  single=False, default=None, section=None, label=None, catalog=False):
+    """Arma la definición de un detector.
+
+    La consulta se declara con `source` (clase CIM, con `namespace` y las
+    propiedades `fields` opcionales), con `command` (expresión de PowerShell
+    o función que la arma con los resultados de `depends`) o con `collect`
+    (función de Python que recibe esos resultados). Con `command`, `fields`
+    son las propiedades de cada objeto devuelto; sin `fields`, cada resultado
+    es un valor suelto. `record` convierte cada fila en el registro de
+    salida y `finish(registros, deps)` arma el valor final. Los detectores
+    "cim" se agrupan en una sola llamada a PowerShell; "slow" y "network"
+    corren en paralelo con ese lote. `section(f, valor)` escribe la
+    categoría en el informe, `label` es el texto de su casilla en la GUI y
+    `catalog` incluye sus registros en el catálogo de componentes (--catalog).
+    """
+    if not re.fullmatch(r"\w+", name):
+        raise ValueError(f"Nombre de detector inválido: {name!r}")
+    if sum(x is not None for x in (source, command, collect)) != 1:
+        raise ValueError(f"El detector {name} necesita uno (y sólo uno) de source, command o collect")
+    if cost not in COST_CLASSES:
+        raise ValueError(f"Costo desconocido para {name}: {cost} (válidos: {', '.join(COST_CLASSES)})")
+    # Estos valores se copian tal cual dentro del script de PowerShell
+    if source is not None and not re.fullmatch(r"\w+", source):
+        raise ValueError(f"Clase CIM inválida para {name}: {source!r}")
+    if namespace is not None and not re.fullmatch(r"\w+(\\\w+)*", namespace):
+        raise ValueError(f"Namespace inválido para {name}: {namespace!r}")
+    bad = [f for f in fields or () if not re.fullmatch(r"\w+", f)]
+    if bad:
+        raise ValueError(f"Campos inválidos para {name}: {', '.join(map(repr, bad))}")
+    return {
+        "name": name,
+        "source": source,
+        "fields": list(fields) if fields else None,
+        "namespace": namespace,
+        "command": command,
+        "collect": collect,
+        "record": record,
+        "finish": finish,
+        "depends": tuple(depends),
+        "cost": cost,
+        "single": single,
+        "default": default,
+        "section": section,
+        "label": label or name,
+        "catalog": catalog,
+    }
+
+def register_detector(name, **options):
+    """Registra un detector; las opciones son las de make_detector."""
+    DETECTORS[name] = make_detector(name, **options)
+
+def load_plugins():
+    """Carga los detectores de terceros. Devuelve [(entry point, error)] de los que fallaron.
+
+    Cada entry point del grupo PLUGIN_GROUP apunta a una función que recibe
+    register_detector.
+    """
+    try:
+        from importlib.metadata import entry_points
+        eps = entry_points()
+        eps = eps.select(group=PLUGIN_GROUP) if hasattr(eps, "select") else eps.get(PLUGIN_GROUP, [])
+    except Exception:
+        return []
+    errors = []
+    for ep in eps:
+        try:
+            ep.load()(register_detector)
+        except Exception as e:
+            errors.append((ep.name, e))
+    return errors
+
+def categories():
+    # Los detectores con sección, en orden de registro, son las categorías del informe
+    return [name for name, d in DETECTORS.items() if d["section"]]
+
+def scan(selected=None, failed=None):
+    """Corre sólo los detectores de las categorías pedidas (None = todas)."""
+    if selected is None:
+        selected = categories()
+    with span("detectors"):
+        return run_detectors([name for name in categories() if name in selected], failed)
+
+def render_report(results, header, selected=None):
+    # Las secciones siguen el orden de registro, no el de `selected`
+    if selected is None:
+        selected = categories()
+    with span("render", "report"):
+        f = io.StringIO()
+        f.write(header)
+        for name in categories():
+            if name in selected:
+                with span(f"section:{name}", "report"):
+                    DETECTORS[name]["section"](f, results[name])
+        return f.getvalue()
+
+def resolve_detectors(names):
+    # Orden topológico de los detectores pedidos y sus dependencias
+    order = []
+    visiting = set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name not in DETECTORS:
+            raise ValueError(f"Detector desconocido: {name}")
+        if name in visiting:
+            raise ValueError(f"Dependencia circular en el detector {name}")
+        visiting.add(name)
+        for dep in DETECTORS[name]["depends"]:
+            visit(dep)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+def as_list(data):
+    if data is None:
+        return []
+    if isinstance(data, dict):
+        # Windows PowerShell 5.1 a veces serializa los arrays como {value, Count}
+        if set(data) == {"value", "Count"}:
+            return as_list(data["value"])
+        return [data]
+    if isinstance(data, list):
+        return data
+    return [data]
+
+def dep_values(d, results):
+    return {dep: results[dep] for dep in d["depends"]}
+
+def needs_deps(d):
+    # collect y los command dinámicos se arman con los resultados de depends
+    return d["collect"] is not None or callable(d["command"])
+
+def ps_expression(d, results, wire="json"):
+    if d["source"]:
+        ns = f" -Namespace {d['namespace']}" if d["namespace"] else ""
+        expr = f"Get-CimInstance{ns} -ClassName {d['source']}"
+        if d["fields"]:
+            # En "rows" las propiedades se leen directamente, sin Select-Object
+            if wire == "rows":
+                expr += " -Property " + ",".join(d["fields"])
+            else:
+                expr += " | Select-Object " + ",".join(d["fields"])
+        return expr
+    if callable(d["command"]):
+        return d["command"](dep_values(d, results))
+    return d["command"]
+
+def ps_quote(text):
+    return "'" + str(text).replace("'", "''") + "'"
+
+def batch_script(batch, results, wire):
+    # PowerShell analiza el script entero antes de ejecutarlo: cada consulta se
+    # compila con [scriptblock]::Create dentro de su try, así un comando con
+    # errores de sintaxis sólo deja vacío a su propio detector.
+    tracing = TRACE is not None
+    lines = [PS_UTF8]
+    if wire == "rows":
+        lines.append(PS_ROWS_PRELUDE)
+    else:
+        lines.append("$r = @{}")
+    if tracing:
+        lines.append("$sw = [Diagnostics.Stopwatch]::StartNew(); "
+                     "$t = [ordered]@{ '__start' = [DateTimeOffset]::UtcNow.ToUnixTimeMilliseconds() }")
+
+    for d in batch:
+        name = d["name"]
+        try:
+            expr = ps_expression(d, results, wire)
+        except Exception:
+            expr = ""
+        query = f"& ([scriptblock]::Create({ps_quote(expr)}))"
+        if wire == "rows":
+            fields = "@(" + ",".join(f"'{f}'" for f in d["fields"]) + ")" if d["fields"] else "$null"
+            query = (f"try {{ Out-Rows '{name}' @({query}) {fields} }} "
+                     f"catch {{ [Console]::Out.Write('__failed' + $US + 's{name}' + $RS) }}")
+        else:
+            query = f"try {{ $r['{name}'] = @({query}) }} catch {{ $r['{name}'] = $null }}"
+        if tracing:
+            query = f"$t0 = $sw.Elapsed.TotalMilliseconds; {query}; $t['cim:{name}'] = @($t0, $sw.Elapsed.TotalMilliseconds)"
+        lines.append(query)
+
+    if wire == "rows":
+        if tracing:
+            lines.append("[Console]::Out.Write('__trace' + $US + (Enc ($t | ConvertTo-Json -Compress)) + $RS)")
+        # Sin esta marca, el proceso terminó antes de tiempo
+        lines.append("[Console]::Out.Write('__end' + $US + 'n' + $RS)")
+    elif tracing:
+        lines.append("$t0 = $sw.Elapsed.TotalMilliseconds; $json = $r | ConvertTo-Json -Depth 4; "
+                     "$t['ConvertTo-Json'] = @($t0, $sw.Elapsed.TotalMilliseconds)")
+        lines.append(f"$json; '{TRACE_MARK}'; $t | ConvertTo-Json -Compress")
+    else:
+        lines.append("$r | ConvertTo-Json -Depth 4")
+    return "\n".join(lines)
+
+def fetch_batch(batch, results, wire=None):
+    # Un único proceso de PowerShell para todo el lote. Devuelve {nombre: filas},
+    # con None para los detectores cuya consulta falló.
+    wire = wire or WIRE_FORMAT
+    script = batch_script(batch, results, wire)
+
+    with span("batch", detectors=[d["name"] for d in batch], wire=wire):
+        spawned = time.perf_counter()
+        if wire == "rows":
+            rows = {d["name"]: [] for d in batch}
+            fields = {d["name"]: d["fields"] for d in batch}
+            complete = False
+            for name, record in iter_rows(stream_powershell(script), fields):
+                if name in rows:
+                    rows[name].append(record)
+                elif name == "__failed" and record in rows:
+                    rows[record] = None
+                elif name == "__trace":
+                    trace_timings(record, spawned, time.perf_counter())
+                elif name == "__end":
+                    complete = True
+            return rows if complete else dict.fromkeys(rows)
+
+        out = run_powershell(script)
+        if TRACE is not None:
+            out = trace_powershell(out, spawned, time.perf_counter())
+        with span("json.loads", bytes=len(out)):
+            try:
+                data = json.loads(out)
+            except ValueError:
+                data = None
+    if not isinstance(data, dict):
+        return dict.fromkeys(d["name"] for d in batch)
+    # El catch del script deja null; una consulta sin resultados deja []
+    return {d["name"]: None if data.get(d["name"]) is None else as_list(data[d["name"]]) for d in batch}
+
+def fetch_one(d, results):
+    if d["collect"] is None:
+        return fetch_batch([d], results)
+    try:
+        with span(f"collect:{d['name']}"):
+            return {d["name"]: as_list(d["collect"](dep_values(d, results)))}
+    except Exception:
+        return {d["name"]: None}
+
+def fetch_detectors(ready, results):
+    batch = [d for d in ready if d["collect"] is None and d["cost"] == "cim"]
+    alone = [d for d in ready if d not in batch]
+    raw = {}
+    with ThreadPoolExecutor(max_workers=len(alone) + 1) as pool:
+        jobs = [pool.submit(fetch_batch, batch, results)] if batch else []
+        jobs += [pool.submit(fetch_one, d, results) for d in alone]
+        for job in jobs:
+            raw.update(job.result())
+    return raw
+
+def finish_detector(d, rows, results):
+    with span(f"detector:{d['name']}", rows=len(rows)):
+        return build_value(d, rows, results)
+
+def build_value(d, rows, results):
+    try:
+        records = [d["record"](row) for row in rows] if d["record"] else rows
+        if d["finish"]:
+            return d["finish"](records, dep_values(d, results))
+        if d["single"]:
+            return records[0] if records else d["default"]
+        return records
+    except Exception:
+        if d["single"] or d["default"] is not None:
+            return d["default"]
+        return []
+
+def run_detectors(names, failed=None):
+    """Ejecuta los detectores pedidos (y sus dependencias). Devuelve {nombre: valor}.
+
+    Si se pasa el conjunto `failed`, recibe los detectores cuya consulta
+    falló; su valor es el mismo que el de una consulta sin resultados.
+    """
+    order = resolve_detectors(names)
+    raw = {}
+    results = {}
+    while len(results) < len(order):
+        # Una consulta fija se lanza de inmediato; una que se arma con los
+        # resultados de otros detectores espera a que estén listos.
+        ready = [
+            DETECTORS[n] for n in order
+            if n not in raw and (not needs_deps(DETECTORS[n])
+                                 or all(dep in results for dep in DETECTORS[n]["depends"]))
+        ]
+        with span("fetch", detectors=[d["name"] for d in ready]):
+            raw.update(fetch_detectors(ready, results))
+        for n in order:
+            d = DETECTORS[n]
+            if n in raw and n not in results and all(dep in results for dep in d["depends"]):
+                if raw[n] is None and failed is not None:
+                    failed.add(n)
+                results[n] = finish_detector(d, raw[n] or [], results)
+    return results
+
+# ------------------ RETENCIÓN ------------------
+
+REPORT_PREFIX = "PC_INFO_"
+REPORT_STAMP = "%Y-%m-%d_%H-%M-%S"
+ARCHIVE_NAME = "PC_INFO_archivo.zip"
+# PC_INFO_<fecha>.txt; si ya hay un informe en ese segundo, PC_INFO_<fecha>_2.txt, ...
+REPORT_NAME = re.compile(re.escape(REPORT_PREFIX) + r"(\d{4}-\d\d-\d\d_\d\d-\d\d-\d\d)(?:_(\d+))?\.txt")
+
+# Retención (0 = sin límite). Por defecto no se borra nada: los informes
+# anteriores sólo se comprimen, y la carpeta (el Escritorio) puede tener
+# informes que el usuario quiere conservar. Borrar por cantidad o antigüedad
+# se activa con --keep/--keep-days o PCINFO_KEEP/PCINFO_KEEP_DAYS; la carpeta
+# se cambia con PCINFO_OUTPUT_DIR.
+DEFAULT_KEEP = 0
+DEFAULT_KEEP_DAYS = 0
+
+def env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def default_output_dir():
+    out = os.environ.get("PCINFO_OUTPUT_DIR")
+    if out:
+        return out
+    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
+    if not os.path.isdir(desktop):
+        desktop = os.getcwd()
+    return desktop
+
+def report_key(name):
+    # (fecha, número) para ordenar los informes; None si no es un informe
+    m = REPORT_NAME.fullmatch(name)
+    if not m:
+        return None
+    try:
+        stamp = datetime.datetime.strptime(m.group(1), REPORT_STAMP)
+    except ValueError:
+        return None
+    return stamp, int(m.group(2) or 1)
+
+def report_time(name):
+    key = report_key(name)
+    return key[0] if key else None
+
+def list_reports(out_dir):
+    return sorted((n for n in os.listdir(out_dir) if report_key(n)), key=report_key)
+
+def archived_reports(archive):
+    try:
+        with zipfile.ZipFile(archive, "r") as z:
+            return set(z.namelist())
+    except (OSError, zipfile.BadZipFile):
+        return set()
+
+def prune_archive(archive, keep, keep_days):
+    # keep: informes a conservar dentro del archivo (None = sin límite)
+    if not os.path.isfile(archive):
+        return
+    with zipfile.ZipFile(archive, "r") as z:
+        names = sorted((n for n in z.namelist() if report_key(n)), key=report_key)
+        kept = names
+        if keep_days > 0:
+            limit = datetime.datetime.now() - datetime.timedelta(days=keep_days)
+            kept = [n for n in kept if report_time(n) >= limit]
+        if keep is not None:
+            kept = kept[-keep:] if keep > 0 else []
+        if kept == names:
+            return
+        entries = [(z.getinfo(n), z.read(n)) for n in kept]
+
+    if not entries:
+        os.remove(archive)
+        return
+    tmp = archive + ".tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as out:
+        for info, payload in entries:
+            out.writestr(info, payload, zipfile.ZIP_DEFLATED)
+    os.replace(tmp, archive)
+
+def rotate_reports(out_dir, keep, keep_days, current):
+    # `current` (el informe de este escaneo) queda como .txt; el resto se
+    # comprime en el archivo rotativo y se recorta según la política de
+    # retención. No se decide por el orden de los nombres: si el reloj
+    # retrocede (cambio de horario, NTP), el informe nuevo puede ordenar
+    # antes que uno anterior.
+    archive = os.path.join(out_dir, ARCHIVE_NAME)
+    current = os.path.basename(current)
+    old = [n for n in list_reports(out_dir) if n != current]
+    if old:
+        with zipfile.ZipFile(archive, "a", zipfile.ZIP_DEFLATED) as z:
+            stored = set(z.namelist())
+            for name in old:
+                if name not in stored:
+                    z.write(os.path.join(out_dir, name), name)
+        for name in old:
+            os.remove(os.path.join(out_dir, name))
+    prune_archive(archive, keep - 1 if keep > 0 else None, keep_days)
+
+def write_new_report(content, out_dir):
+    # Nunca pisa un informe anterior: el número va por encima del mayor de ese
+    # segundo, en la carpeta o dentro del archivo, así tampoco se reutiliza un
+    # nombre que la poda ya sacó del archivo.
+    stamp = datetime.datetime.now().strftime(REPORT_STAMP)
+    when = datetime.datetime.strptime(stamp, REPORT_STAMP)
+    names = set(os.listdir(out_dir)) | archived_reports(os.path.join(out_dir, ARCHIVE_NAME))
+    last = max((key[1] for key in map(report_key, names) if key and key[0] == when), default=0)
+    for n in itertools.count(last + 1):
+        name = f"{REPORT_PREFIX}{stamp}.txt" if n == 1 else f"{REPORT_PREFIX}{stamp}_{n}.txt"
+        file_path = os.path.join(out_dir, name)
+        try:
+            with open(file_path, "x", encoding="utf-8") as f:
+                f.write(content)
+        except FileExistsError:
+            continue
+        return file_path
+
+def save_report(content, out_dir, keep=DEFAULT_KEEP, keep_days=DEFAULT_KEEP_DAYS, dedup=True):
+    """Guarda el informe y aplica la retención. Devuelve (ruta, escrito)."""
+    os.makedirs(out_dir, exist_ok=True)
+    previous = list_reports(out_dir)
+    file_path = None
+    if dedup and previous:
+        last = os.path.join(out_dir, previous[-1])
+        try:
+            with open(last, "r", encoding="utf-8", errors="ignore") as f:
+                if f.read() == content:
+                    file_path = last
+        except OSError:
+            pass
+
+    written = file_path is None
+    if written:
+        with span("write", "report", bytes=len(content)):
+            file_path = write_new_report(content, out_dir)
+
+    # También sin informe nuevo, para que --keep-days siga recortando el archivo
+    with span("rotate", "report"):
+        rotate_reports(out_dir, keep, keep_days, file_path)
+    return file_path, written
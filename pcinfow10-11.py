@@ -1,184 +1,394 @@
-import subprocess
 import datetime
 import os
 import json
-import urllib.parse
+import statistics
+import time
+import argparse
+import hashlib
+import sqlite3
+import platform
 
-def run_powershell(ps_command):
-    try:
-        completed = subprocess.run(
-            ["powershell", "-NoLogo", "-NoProfile", "-Command", ps_command],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="ignore"
-        )
-        return completed.stdout.strip()
-    except Exception as e:
-        return f"ERROR: {e}"
-
-def make_search_url(name):
-    if not name or name.lower() == "unknown":
-        return ""
-    return f"https://www.google.com/search?q={urllib.parse.quote_plus(name)}"
+from pcinfo_core import (
+    DEFAULT_KEEP, DEFAULT_KEEP_DAYS, DETECTORS, TRACE_NAME, WIRE_FORMATS,
+    as_list, categories, default_output_dir, env_int, env_wire_format, fetch_batch, load_plugins, make_detector,
+    make_search_url, register_detector, render_report, save_report, scan, set_wire_format,
+    span, start_trace, trace_path, write_trace
+)
+
+REPORT_HEADER = ("INFORME COMPLETO DEL EQUIPO (Compatible con Windows 11)\n"
+                 "========================================================\n\n")
 
 # ------------------ DETECTORES ------------------
 
-def get_cpu_info():
-    cmd = "Get-CimInstance Win32_Processor | Select-Object Name,Manufacturer,NumberOfCores,NumberOfLogicalProcessors | ConvertTo-Json"
-    out = run_powershell(cmd)
-    try:
-        data = json.loads(out)
-        if isinstance(data, dict):
-            data = [data]
-        cpus = []
-        for cpu in data:
-            cpus.append({
-                "name": cpu.get("Name", "Unknown"),
-                "manufacturer": cpu.get("Manufacturer", "Unknown"),
-                "cores": cpu.get("NumberOfCores", "Unknown"),
-                "threads": cpu.get("NumberOfLogicalProcessors", "Unknown"),
-                "url": make_search_url(cpu.get("Name", ""))
-            })
-        return cpus
-    except:
-        return []
+def cpu_record(cpu):
+    return {
+        "name": cpu.get("Name", "Unknown"),
+        "manufacturer": cpu.get("Manufacturer", "Unknown"),
+        "cores": cpu.get("NumberOfCores", "Unknown"),
+        "threads": cpu.get("NumberOfLogicalProcessors", "Unknown"),
+        "url": make_search_url(cpu.get("Name", ""))
+    }
 
-def get_gpu_info():
-    cmd = "Get-CimInstance Win32_VideoController | Select-Object Name,AdapterCompatibility,DriverVersion | ConvertTo-Json"
-    out = run_powershell(cmd)
-    try:
-        data = json.loads(out)
-        if isinstance(data, dict):
-            data = [data]
-        gpus = []
-        for gpu in data:
-            gpus.append({
-                "name": gpu.get("Name", "Unknown"),
-                "vendor": gpu.get("AdapterCompatibility", "Unknown"),
-                "driver": gpu.get("DriverVersion", "Unknown"),
-                "url": make_search_url(gpu.get("Name", ""))
-            })
-        return gpus
-    except:
-        return []
+def section_cpu(f, cpus):
+    f.write("=== CPU ===\n")
+    for c in cpus:
+        f.write(f"Modelo      : {c['name']}\n")
+        f.write(f"Fabricante  : {c['manufacturer']}\n")
+        f.write(f"Núcleos     : {c['cores']}\n")
+        f.write(f"Hilos       : {c['threads']}\n")
+        f.write(f"URL         : {c['url']}\n\n")
 
-def get_ram_info():
-    cmd = "(Get-CimInstance Win32_ComputerSystem).TotalPhysicalMemory"
-    out = run_powershell(cmd)
-    try:
-        ram_gb = round(int(out) / (1024**3))
-        return ram_gb
-    except:
-        return 0
+def gpu_record(gpu):
+    return {
+        "name": gpu.get("Name", "Unknown"),
+        "vendor": gpu.get("AdapterCompatibility", "Unknown"),
+        "driver": gpu.get("DriverVersion", "Unknown"),
+        "url": make_search_url(gpu.get("Name", ""))
+    }
 
-def get_disks():
-    cmd = "Get-CimInstance Win32_DiskDrive | Select-Object Model,MediaType,Size | ConvertTo-Json"
-    out = run_powershell(cmd)
-    try:
-        data = json.loads(out)
-        if isinstance(data, dict):
-            data = [data]
-        disks = []
-        for d in data:
-            size_gb = 0
-            try:
-                size_gb = round(int(d.get("Size", 0)) / (1024**3))
-            except:
-                pass
-
-            disks.append({
-                "model": d.get("Model", "Unknown"),
-                "type": d.get("MediaType", "Unknown"),
-                "size_gb": size_gb,
-                "url": make_search_url(d.get("Model", ""))
-            })
-        return disks
-    except:
-        return []
+def section_gpu(f, gpus):
+    f.write("=== GPU ===\n")
+    for g in gpus:
+        f.write(f"Modelo      : {g['name']}\n")
+        f.write(f"Vendor      : {g['vendor']}\n")
+        f.write(f"Driver      : {g['driver']}\n")
+        f.write(f"URL         : {g['url']}\n\n")
 
-def get_motherboard():
-    cmd = "Get-CimInstance Win32_BaseBoard | Select-Object Manufacturer,Product | ConvertTo-Json"
-    out = run_powershell(cmd)
-    try:
-        data = json.loads(out)
-        mb = f"{data.get('Manufacturer', '')} {data.get('Product', '')}".strip()
-        return {
-            "name": mb,
-            "url": make_search_url(mb)
-        }
-    except:
-        return {"name": "Unknown", "url": ""}
+def ram_record(cs):
+    return round(int(cs.get("TotalPhysicalMemory")) / (1024**3))
+
+def section_ram(f, ram):
+    f.write(f"=== RAM ===\nTotal detectado: {ram} GB\n\n")
 
-def get_fans():
-    cmd = "Get-CimInstance Win32_Fan | Select-Object Name | ConvertTo-Json"
-    out = run_powershell(cmd)
+def disk_record(d):
+    size_gb = 0
     try:
-        data = json.loads(out)
-        if isinstance(data, dict):
-            data = [data]
-        fans = [f.get("Name", "Unknown") for f in data]
-        return fans
+        size_gb = round(int(d.get("Size", 0)) / (1024**3))
     except:
-        return []
+        pass
+
+    return {
+        "model": d.get("Model", "Unknown"),
+        "type": d.get("MediaType", "Unknown"),
+        "size_gb": size_gb,
+        "url": make_search_url(d.get("Model", ""))
+    }
+
+def section_disks(f, disks):
+    f.write("=== Discos ===\n")
+    for d in disks:
+        f.write(f"Modelo : {d['model']}\n")
+        f.write(f"Tipo   : {d['type']}\n")
+        f.write(f"Tamaño : {d['size_gb']} GB\n")
+        f.write(f"URL    : {d['url']}\n\n")
+
+def motherboard_record(data):
+    mb = f"{data.get('Manufacturer', '')} {data.get('Product', '')}".strip()
+    return {
+        "name": mb,
+        "url": make_search_url(mb)
+    }
+
+def section_motherboard(f, mb):
+    f.write("=== Motherboard ===\n")
+    f.write(f"Modelo : {mb['name']}\n")
+    f.write(f"URL    : {mb['url']}\n\n")
+
+def section_fans(f, fans):
+    f.write("=== Ventiladores / Fans ===\n")
+    if fans:
+        for fan in fans:
+            f.write(f"- {fan}\n")
+    else:
+        f.write("No reportados por el sistema.\n")
+
+# El orden de registro es el orden de las secciones en el informe
+register_detector("cpu", source="Win32_Processor",
+                  fields=["Name", "Manufacturer", "NumberOfCores", "NumberOfLogicalProcessors"],
+                  record=cpu_record, section=section_cpu, catalog=True)
+register_detector("gpu", source="Win32_VideoController",
+                  fields=["Name", "AdapterCompatibility", "DriverVersion"],
+                  record=gpu_record, section=section_gpu, catalog=True)
+register_detector("ram", source="Win32_ComputerSystem", fields=["TotalPhysicalMemory"],
+                  record=ram_record, single=True, default=0, section=section_ram, catalog=True)
+register_detector("disks", source="Win32_DiskDrive", fields=["Model", "MediaType", "Size"],
+                  record=disk_record, section=section_disks, catalog=True)
+register_detector("motherboard", source="Win32_BaseBoard", fields=["Manufacturer", "Product"],
+                  record=motherboard_record, single=True,
+                  default={"name": "Unknown", "url": ""}, section=section_motherboard, catalog=True)
+register_detector("fans", source="Win32_Fan", fields=["Name"],
+                  record=lambda fan: fan.get("Name", "Unknown"), section=section_fans, catalog=True)
+
+# ------------------ CATÁLOGO ------------------
+
+# Catálogo de inventario para flotas: cada componente distinto se guarda una
+# sola vez con un id derivado de su contenido, y cada equipo apunta a un
+# snapshot que también se direcciona por contenido (lista de ids).
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS components (
+    id TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS components_category ON components (category);
+CREATE TABLE IF NOT EXISTS snapshot_components (
+    snapshot_id TEXT NOT NULL,
+    component_id TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, component_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snapshot_components_component ON snapshot_components (component_id);
+CREATE TABLE IF NOT EXISTS hosts (
+    host TEXT PRIMARY KEY,
+    snapshot_id TEXT NOT NULL,
+    seen_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hosts_snapshot ON hosts (snapshot_id);
+CREATE TABLE IF NOT EXISTS scans (
+    host TEXT NOT NULL,
+    snapshot_id TEXT NOT NULL,
+    taken_at TEXT NOT NULL
+);
+"""
+
+def content_id(payload):
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]
+
+def catalog_components(results, selected=None):
+    """{categoría: [registros]} de las categorías del catálogo escaneadas con éxito.
+
+    `selected` son las categorías que se escanearon y cuya consulta no falló
+    (None = todas las de `results`). Una lista vacía es un resultado válido
+    (p. ej. sin ventiladores); un detector de valor único que devolvió su
+    valor por defecto cuenta como sin datos. La URL de búsqueda se deriva
+    del nombre, así que no forma parte del id.
+    """
+    components = {}
+    for name, d in DETECTORS.items():
+        if not d["catalog"] or name not in results or (selected is not None and name not in selected):
+            continue
+        if d["single"] and results[name] == d["default"]:
+            continue
+        records = []
+        for value in as_list(results[name]):
+            if isinstance(value, dict):
+                records.append({k: v for k, v in value.items() if k != "url"})
+            else:
+                records.append({"value": value})
+        components[name] = records
+    return components
+
+def open_catalog(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(CATALOG_SCHEMA)
+    return conn
+
+def store_snapshot(conn, host, results, selected=None):
+    """Guarda el escaneo de `host`. Devuelve (snapshot_id, cambió).
+
+    `selected` son las categorías escaneadas con éxito: las demás (fuera de
+    --only/--skip o cuya consulta falló) conservan los componentes del
+    snapshot anterior del equipo, y las escaneadas lo reemplazan aunque
+    hayan vuelto vacías. Si no queda ninguna categoría (PowerShell falló)
+    no se guarda nada y devuelve (None, False).
+    """
+    scanned = catalog_components(results, selected)
+    if not scanned:
+        return None, False
+    counts = {}
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    with conn:
+        row = conn.execute("SELECT snapshot_id FROM hosts WHERE host = ?", (host,)).fetchone()
+        if row is not None:
+            for cid, category, n in conn.execute(
+                    "SELECT sc.component_id, c.category, sc.count FROM snapshot_components sc "
+                    "JOIN components c ON c.id = sc.component_id WHERE sc.snapshot_id = ?", (row[0],)):
+                if category not in scanned:
+                    counts[cid] = n
+
+        for category, records in scanned.items():
+            for record in records:
+                cid = content_id([category, record])
+                conn.execute("INSERT OR IGNORE INTO components (id, category, data) VALUES (?, ?, ?)",
+                             (cid, category, json.dumps(record, sort_keys=True, ensure_ascii=False)))
+                counts[cid] = counts.get(cid, 0) + 1
+
+        snapshot_id = content_id(sorted(counts.items()))
+        conn.executemany(
+            "INSERT OR IGNORE INTO snapshot_components (snapshot_id, component_id, count) VALUES (?, ?, ?)",
+            [(snapshot_id, cid, n) for cid, n in counts.items()])
+
+        changed = row is None or row[0] != snapshot_id
+        conn.execute("INSERT OR REPLACE INTO hosts (host, snapshot_id, seen_at) VALUES (?, ?, ?)",
+                     (host, snapshot_id, now))
+        if changed:
+            conn.execute("INSERT INTO scans (host, snapshot_id, taken_at) VALUES (?, ?, ?)",
+                         (host, snapshot_id, now))
+    return snapshot_id, changed
+
+def find_components(conn, category, fields):
+    matches = []
+    for cid, data in conn.execute("SELECT id, data FROM components WHERE category = ?", (category,)):
+        record = json.loads(data)
+        if all(str(record.get(k, "")).casefold() == v.casefold() for k, v in fields.items()):
+            matches.append(cid)
+    return matches
+
+def find_hosts(conn, filters):
+    """Equipos cuyo último escaneo tiene un componente que cumple cada filtro.
+
+    `filters` es una lista de (categoría, {campo: valor}); los valores se
+    comparan sin distinguir mayúsculas.
+    """
+    hosts = None
+    for category, fields in filters:
+        ids = find_components(conn, category, fields)
+        found = set()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            found.update(row[0] for row in conn.execute(
+                "SELECT DISTINCT h.host FROM snapshot_components sc "
+                f"JOIN hosts h ON h.snapshot_id = sc.snapshot_id WHERE sc.component_id IN ({marks})",
+                chunk))
+        hosts = found if hosts is None else hosts & found
+        if not hosts:
+            break
+    return sorted(hosts or [])
 
 # ------------------ INFORME ------------------
 
-def main():
-    now = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
-    if not os.path.isdir(desktop):
-        desktop = os.getcwd()
-
-    file_path = os.path.join(desktop, f"PC_INFO_{now}.txt")
-
-    cpu = get_cpu_info()
-    gpu = get_gpu_info()
-    ram = get_ram_info()
-    disks = get_disks()
-    mb = get_motherboard()
-    fans = get_fans()
-
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write("INFORME COMPLETO DEL EQUIPO (Compatible con Windows 11)\n")
-        f.write("========================================================\n\n")
-
-        f.write("=== CPU ===\n")
-        for c in cpu:
-            f.write(f"Modelo      : {c['name']}\n")
-            f.write(f"Fabricante  : {c['manufacturer']}\n")
-            f.write(f"Núcleos     : {c['cores']}\n")
-            f.write(f"Hilos       : {c['threads']}\n")
-            f.write(f"URL         : {c['url']}\n\n")
-
-        f.write("=== GPU ===\n")
-        for g in gpu:
-            f.write(f"Modelo      : {g['name']}\n")
-            f.write(f"Vendor      : {g['vendor']}\n")
-            f.write(f"Driver      : {g['driver']}\n")
-            f.write(f"URL         : {g['url']}\n\n")
-
-        f.write(f"=== RAM ===\nTotal detectado: {ram} GB\n\n")
-
-        f.write("=== Discos ===\n")
-        for d in disks:
-            f.write(f"Modelo : {d['model']}\n")
-            f.write(f"Tipo   : {d['type']}\n")
-            f.write(f"Tamaño : {d['size_gb']} GB\n")
-            f.write(f"URL    : {d['url']}\n\n")
-
-        f.write("=== Motherboard ===\n")
-        f.write(f"Modelo : {mb['name']}\n")
-        f.write(f"URL    : {mb['url']}\n\n")
-
-        f.write("=== Ventiladores / Fans ===\n")
-        if fans:
-            for fan in fans:
-                f.write(f"- {fan}\n")
-        else:
-            f.write("No reportados por el sistema.\n")
-
-    print(f"Informe generado en: {file_path}")
+def select_categories(only=None, skip=None):
+    selected = categories() if only is None else only
+    return [c for c in categories() if c in selected and c not in (skip or [])]
+
+def category_list(value):
+    names = [v.strip().lower() for v in value.split(",") if v.strip()]
+    unknown = [n for n in names if n not in categories()]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"categoría desconocida: {', '.join(unknown)} (válidas: {', '.join(categories())})")
+    return names
+
+def bench_wire(rounds):
+    # Compara ambos formatos con un inventario grande (dispositivos PnP)
+    d = make_detector("pnp", source="Win32_PnPEntity",
+                      fields=["Name", "Manufacturer", "PNPClass", "Status", "DeviceID"])
+    records = {}
+    for wire in WIRE_FORMATS:
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            records[wire] = fetch_batch([d], {}, wire)["pnp"]
+            times.append(time.perf_counter() - start)
+        print(f"{wire:5} {len(records[wire]):5} dispositivos  "
+              f"mejor {min(times) * 1000:7.0f} ms  mediana {statistics.median(times) * 1000:7.0f} ms")
+    same = records["rows"] == records["json"]
+    print("Registros idénticos en ambos formatos." if same else "Los formatos devolvieron registros distintos.")
+
+def component_filter(value):
+    # "gpu:name=NVIDIA GeForce RTX 3060,driver=31.0.15.3623"
+    category, sep, rest = value.partition(":")
+    category = category.strip().lower()
+    if not sep or category not in categories():
+        raise argparse.ArgumentTypeError(
+            f"filtro inválido: {value} (formato categoría:campo=valor,...; categorías: {', '.join(categories())})")
+    fields = {}
+    for part in rest.split(","):
+        key, eq, val = part.partition("=")
+        if not eq or not key.strip():
+            raise argparse.ArgumentTypeError(f"filtro inválido: {value} (se esperaba campo=valor)")
+        fields[key.strip()] = val.strip()
+    return category, fields
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Informe de hardware para Windows 10 / 11")
+    parser.add_argument("--output-dir", default=default_output_dir(),
+                        help="Carpeta donde se guardan los informes (por defecto: Escritorio)")
+    parser.add_argument("--keep", type=int, default=env_int("PCINFO_KEEP", DEFAULT_KEEP),
+                        help="Cantidad máxima de informes a conservar (0 = sin límite, por defecto)")
+    parser.add_argument("--keep-days", type=int, default=env_int("PCINFO_KEEP_DAYS", DEFAULT_KEEP_DAYS),
+                        help="Días que se conservan los informes archivados (0 = sin límite, por defecto)")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Guardar el informe aunque sea idéntico al anterior")
+    parser.add_argument("--only", type=category_list, metavar="CATEGORÍAS",
+                        help=f"Escanear sólo estas categorías, separadas por comas ({', '.join(categories())})")
+    parser.add_argument("--skip", type=category_list, metavar="CATEGORÍAS",
+                        help="Categorías a omitir, separadas por comas")
+    parser.add_argument("--trace", nargs="?", const="", metavar="ARCHIVO",
+                        help="Guardar una traza del escaneo (JSON para chrome://tracing o Perfetto; "
+                             f"por defecto {TRACE_NAME} en la carpeta de informes, que se sobrescribe)")
+    parser.add_argument("--wire", choices=WIRE_FORMATS, default=env_wire_format(),
+                        help="Formato entre PowerShell y Python: json (ConvertTo-Json, por defecto) o rows (compacto)")
+    parser.add_argument("--bench-wire", type=int, nargs="?", const=5, metavar="N",
+                        help="Medir N veces (5 por defecto) ambos formatos con Win32_PnPEntity, sin escanear")
+    parser.add_argument("--catalog", metavar="BASE",
+                        help="Registrar el escaneo en el catálogo de componentes (SQLite) indicado")
+    parser.add_argument("--host", default=os.environ.get("COMPUTERNAME") or platform.node(),
+                        help="Nombre del equipo en el catálogo (por defecto: el nombre del equipo)")
+    parser.add_argument("--find", type=component_filter, action="append", metavar="FILTRO",
+                        help="Buscar en el catálogo los equipos con un componente categoría:campo=valor,... "
+                             "(se puede repetir; sin escanear)")
+    args = parser.parse_args(argv)
+    if args.find and not args.catalog:
+        parser.error("--find necesita --catalog")
+    # argparse no valida el valor por defecto contra choices
+    if args.wire not in WIRE_FORMATS:
+        parser.error(f"PCINFO_WIRE inválido: {args.wire} (válidos: {', '.join(WIRE_FORMATS)})")
+    if not (args.find or args.bench_wire) and not select_categories(args.only, args.skip):
+        parser.error("--only/--skip no dejan ninguna categoría para escanear")
+    return args
+
+def main(argv=None):
+    for name, error in load_plugins():
+        print(f"No se pudo cargar el detector externo {name}: {error}")
+    args = parse_args(argv)
+    set_wire_format(args.wire)
+    if args.bench_wire:
+        bench_wire(args.bench_wire)
+        return
+    if args.find:
+        conn = open_catalog(args.catalog)
+        hosts = find_hosts(conn, args.find)
+        conn.close()
+        for host in hosts:
+            print(host)
+        if not hosts:
+            print("Ningún equipo del catálogo coincide.")
+        return
+
+    if args.trace is not None:
+        start_trace()
+
+    with span("scan", "report"):
+        selected = select_categories(args.only, args.skip)
+        failed = set()
+        results = scan(selected, failed)
+        content = render_report(results, REPORT_HEADER, selected)
+        file_path, written = save_report(content, args.output_dir, args.keep, args.keep_days,
+                                         dedup=not args.no_dedup)
+        if args.catalog:
+            with span("catalog", "report"):
+                conn = open_catalog(args.catalog)
+                snapshot_id, changed = store_snapshot(conn, args.host, results,
+                                                     [c for c in selected if c not in failed])
+                conn.close()
+
+    if written:
+        print(f"Informe generado en: {file_path}")
+    else:
+        print(f"Sin cambios respecto al informe anterior: {file_path}")
+    if args.catalog and snapshot_id is None:
+        print(f"Catálogo {args.catalog}: el escaneo falló, no se actualizó {args.host}")
+    elif args.catalog:
+        state = "nuevo snapshot" if changed else "sin cambios"
+        print(f"Catálogo {args.catalog}: {args.host} -> {snapshot_id} ({state})")
+
+    if args.trace is not None:
+        trace_file = trace_path(args.output_dir, args.trace)
+        write_trace(trace_file)
+        print(f"Traza guardada en: {trace_file}")
     input("Presiona ENTER para salir...")
 
 if __name__ == "__main__":
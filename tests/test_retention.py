@@ -0,0 +1,80 @@
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+import zipfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import pcinfo_core as core
+
+
+def frozen_clock(*moments):
+    # Cada llamada a now() devuelve el siguiente instante (el último se repite)
+    moments = list(moments)
+
+    class Clock(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moments.pop(0) if len(moments) > 1 else moments[0]
+
+    return mock.patch.object(core, "datetime", types.SimpleNamespace(
+        datetime=Clock, timedelta=datetime.timedelta))
+
+
+class SaveReportTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def archived(self):
+        archive = os.path.join(self.dir, core.ARCHIVE_NAME)
+        if not os.path.isfile(archive):
+            return {}
+        with zipfile.ZipFile(archive) as z:
+            return {n: z.read(n).decode("utf-8") for n in z.namelist()}
+
+    def assert_saved(self, path, content):
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(core.list_reports(self.dir), [os.path.basename(path)])
+
+    def test_same_second_with_pruning_keeps_new_report(self):
+        with frozen_clock(datetime.datetime(2026, 10, 19, 12, 0, 0)):
+            for i in range(5):
+                path, written = core.save_report(f"informe {i}", self.dir, keep=3, keep_days=0)
+                self.assertTrue(written)
+                self.assert_saved(path, f"informe {i}")
+        self.assertEqual(sorted(self.archived().values()), ["informe 2", "informe 3"])
+
+    def test_clock_going_back_keeps_new_report(self):
+        later = datetime.datetime(2026, 10, 25, 2, 30, 0)
+        earlier = datetime.datetime(2026, 10, 25, 2, 10, 0)
+        with frozen_clock(later, earlier):
+            core.save_report("antes del cambio", self.dir, keep=0, keep_days=0)
+            path, written = core.save_report("después del cambio", self.dir, keep=0, keep_days=0)
+        self.assertTrue(written)
+        self.assert_saved(path, "después del cambio")
+        self.assertEqual(list(self.archived().values()), ["antes del cambio"])
+
+    def test_defaults_archive_existing_reports_without_deleting(self):
+        for i in range(12):
+            with open(os.path.join(self.dir, f"PC_INFO_2020-01-01_00-00-{i:02}.txt"), "w", encoding="utf-8") as f:
+                f.write(f"viejo {i}")
+        path, _ = core.save_report("nuevo", self.dir)
+        self.assert_saved(path, "nuevo")
+        self.assertEqual(len(self.archived()), 12)
+
+    def test_identical_report_is_not_written_again(self):
+        first, _ = core.save_report("igual", self.dir, keep=0, keep_days=0)
+        path, written = core.save_report("igual", self.dir, keep=0, keep_days=0)
+        self.assertFalse(written)
+        self.assertEqual(path, first)
+        self.assert_saved(path, "igual")
+
+
+if __name__ == "__main__":
+    unittest.main()